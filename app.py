@@ -1,10 +1,31 @@
-from flask import Flask, render_template_string, request
-from sympy import kronecker_symbol, nextprime
-from sympy.ntheory.primetest import is_square
+from flask import Flask, jsonify, make_response, request
+from sympy import kronecker_symbol, nextprime, sieve
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from math import isqrt
 import ast
+import multiprocessing
 import operator
+import os
+import threading
 import waitress
 
+# optional compiled kernel for the ladder (build it with
+# `cythonize -i cheby_kernel.pyx`); falls back to pure Python
+try:
+    import cheby_kernel
+except ImportError:
+    cheby_kernel = None
+
+# optional GMP-backed integers; plain ints otherwise
+try:
+    import gmpy2
+    mpz = gmpy2.mpz
+    powmod = gmpy2.powmod
+except ImportError:
+    mpz = int
+    powmod = pow
+
 # --- Start of code from cheby.py ---
 
 # map AST operators to Python functions
@@ -22,6 +43,34 @@ _unops = {
     ast.USub: operator.neg
 }
 
+# bounds on user input, so one request cannot tie up the server
+MAX_EXPR_LENGTH = 1024
+MAX_EXPONENT = 100000
+MAX_RESULT_BITS = 200000
+# bits produced by all operators of one expression together, which keeps
+# parse_int_expr to a few tens of milliseconds however the input is built
+MAX_TOTAL_BITS = 4 * MAX_RESULT_BITS
+COMPUTE_TIMEOUT = 5.0
+# items per /batch request; parsing them is bounded by MAX_TOTAL_BITS and
+# with the per-item deadline the tests take at most
+# ceil(MAX_BATCH / os.cpu_count()) * COMPUTE_TIMEOUT once they start
+MAX_BATCH = 64
+# inputs up to QUICK_CHECK_BITS get the cheap filters on the request thread,
+# since a worker process costs more than they do (Miller-Rabin on a 512-bit
+# prime takes ~10 ms on plain ints); up to INLINE_TEST_BITS the Chebyshev
+# test is also under a millisecond and runs there too; everything else
+# runs under the deadline in a worker process
+QUICK_CHECK_BITS = 512
+INLINE_TEST_BITS = 128
+
+# odd primes used for trial division before the Chebyshev test (~2000 of them)
+SMALL_PRIMES = list(sieve.primerange(3, 17400))
+
+@lru_cache(maxsize=1024)
+def _parse_cached(expr):
+    # the tree is only read by _evaluate, so it is safe to share
+    return ast.parse(expr, mode='eval')
+
 def parse_int_expr(expr: str) -> int:
     """
     Safely parse and evaluate an integer expression supporting:
@@ -29,48 +78,159 @@ def parse_int_expr(expr: str) -> int:
       - +, -, *, //, %, ** - parentheses
       - caret (^) as exponent shorthand
     """
+    if len(expr) > MAX_EXPR_LENGTH:
+        raise ValueError(f"Expression longer than {MAX_EXPR_LENGTH} characters")
+
+    # plain decimal integers skip the parser entirely; like Python literals
+    # they are ASCII and have no leading zeros unless they are all zeros
+    # (leading whitespace is left for ast.parse to reject as before)
+    s = expr.rstrip()
+    digits = s[1:] if s.startswith('-') else s
+    if digits.isascii() and digits.isdigit() and (digits[0] != '0' or not digits.strip('0')):
+        return int(s)
+
     # replace caret with Python exponent operator
     expr = expr.replace('^', '**')
-    node = ast.parse(expr, mode='eval')
+    node = _parse_cached(expr)
+    binops = _binops
+    unops = _unops
+
+    # walk the tree without recursion: collect nodes parent-first, then
+    # evaluate them in reverse so every child is done before its parent
+    order = []
+    stack = [node]
+    while stack:
+        cur = stack.pop()
+        order.append(cur)
+        if isinstance(cur, ast.Expression):
+            stack.append(cur.body)
+        elif isinstance(cur, ast.BinOp):
+            stack.append(cur.left)
+            stack.append(cur.right)
+        elif isinstance(cur, ast.UnaryOp):
+            stack.append(cur.operand)
+
+    values = {}
+    budget = MAX_TOTAL_BITS
+    for cur in reversed(order):
+        if isinstance(cur, ast.Expression):
+            value = values[id(cur.body)]
+
+        elif isinstance(cur, ast.Constant):
+            if not isinstance(cur.value, int):
+                raise ValueError(f"Non-integer literal {cur.value}")
+            value = cur.value
+
+        elif isinstance(cur, ast.BinOp):
+            op = binops.get(type(cur.op))
+            if op is None:
+                raise ValueError(f"Operator {type(cur.op)} not supported")
+            left, right = values[id(cur.left)], values[id(cur.right)]
+            if op is operator.pow and not (0 <= right < MAX_EXPONENT
+                                           and left.bit_length() * right < MAX_RESULT_BITS):
+                raise ValueError("Exponent out of range")
+            if op is operator.mul and left.bit_length() + right.bit_length() >= MAX_RESULT_BITS:
+                raise ValueError("Product too large")
+            value = op(left, right)
+            budget -= value.bit_length()
+            if budget < 0:
+                raise ValueError("Expression too expensive to evaluate")
+
+        elif isinstance(cur, ast.UnaryOp):
+            op = unops.get(type(cur.op))
+            if op is None:
+                raise ValueError(f"Unary op {type(cur.op)} not supported")
+            value = op(values[id(cur.operand)])
+
+        else:
+            raise ValueError(f"Unsupported AST node {type(cur)}")
+        values[id(cur)] = value
+
+    return values[id(node)]
+
+
+class Montgomery:
+    """
+    Montgomery reduction modulo an odd n.
 
-    def _evaluate(node):
-        if isinstance(node, ast.Expression):
-            return _evaluate(node.body)
+    R = 2**k is picked so that the sum of two products u*u' + c*v*v' of
+    reduced coordinates stays below n*R, which lets mat_mul accumulate a
+    whole dot product before reducing and keeps REDC to one correction.
+    """
+    def __init__(self, n, c):
+        self.n = n = mpz(n)
+        self.k = (2 * (abs(c) + 1) * n).bit_length()
+        self.R = mpz(1) << self.k
+        self.mask = self.R - 1
+        self.n_inv_neg = (-pow(n, -1, self.R)) & self.mask
+
+    def redc(self, t):
+        m = ((t & self.mask) * self.n_inv_neg) & self.mask
+        t = (t + m * self.n) >> self.k
+        if t >= self.n:
+            return t - self.n
+        if t < 0:
+            return t + self.n
+        return t
+
+    def to_mont(self, x):
+        # one-off conversion with a shift and a single division; cheaper
+        # than precomputing R^2 mod n and spending a REDC on it
+        return (x << self.k) % self.n
 
-        if isinstance(node, ast.Constant):
-            if isinstance(node.value, int):
-                return node.value
-            raise ValueError(f"Non-integer literal {node.value}")
+    def from_mont(self, x):
+        return self.redc(x)
 
-        if isinstance(node, ast.BinOp):
-            op_type = type(node.op)
-            if op_type not in _binops:
-                raise ValueError(f"Operator {op_type} not supported")
-            left = _evaluate(node.left)
-            right = _evaluate(node.right)
-            return _binops[op_type](left, right)
+class PlainReduction:
+    # stand-in for Montgomery when n is even, so has no inverse mod 2**k:
+    # coordinates are stored as they are and reduced with % n
+    k = 0
 
-        if isinstance(node, ast.UnaryOp):
-            op_type = type(node.op)
-            if op_type not in _unops:
-                raise ValueError(f"Unary op {op_type} not supported")
-            operand = _evaluate(node.operand)
-            return _unops[op_type](operand)
+    def __init__(self, n):
+        self.n = mpz(n)
 
-        if isinstance(node, ast.Paren):
-            return _evaluate(node.value)
+    def redc(self, t):
+        return t % self.n
 
-        raise ValueError(f"Unsupported AST node {type(node)}")
+    def to_mont(self, x):
+        return x % self.n
 
-    return _evaluate(node)
+    def from_mont(self, x):
+        return x
+
+@lru_cache(maxsize=128)
+def _montgomery(n, c):
+    return Montgomery(n, c) if n & 1 else PlainReduction(n)
 
 
 class QuadraticFieldElement:
+    # u and v are kept in Montgomery form (_u = u*R mod n) so that products
+    # reduce with REDC instead of a big-int division; for even n, where
+    # Montgomery form does not exist, they are kept plain instead.
     def __init__(self, u, v, c, n):
-        self.u = u % n
-        self.v = v % n
         self.c = c
-        self.n = n
+        self.n = n = mpz(n)
+        self.mont = _montgomery(n, c)
+        self._u = self.mont.to_mont(u)
+        self._v = self.mont.to_mont(v)
+
+    @classmethod
+    def _from_mont(cls, u, v, c, n, mont):
+        x = cls.__new__(cls)
+        x.c = c
+        x.n = n
+        x.mont = mont
+        x._u = u
+        x._v = v
+        return x
+
+    @property
+    def u(self):
+        return self.mont.from_mont(self._u)
+
+    @property
+    def v(self):
+        return self.mont.from_mont(self._v)
 
     def __repr__(self):
         return f"{self.u} + {self.v}√{self.c} mod {self.n}"
@@ -79,7 +239,11 @@ class QuadraticFieldElement:
         if not isinstance(other, QuadraticFieldElement):
             other = QuadraticFieldElement(other, 0, self.c, self.n)
         assert self.c == other.c and self.n == other.n
-        return QuadraticFieldElement(self.u + other.u, self.v + other.v, self.c, self.n)
+        n = self.n
+        u = self._u + other._u
+        v = self._v + other._v
+        return QuadraticFieldElement._from_mont(u - n if u >= n else u, v - n if v >= n else v,
+                                                self.c, n, self.mont)
 
     def __sub__(self, other):
         if not isinstance(other, QuadraticFieldElement):
@@ -87,28 +251,85 @@ class QuadraticFieldElement:
         return self + (-other)
     
     def __neg__(self):
-        return QuadraticFieldElement(-self.u, -self.v, self.c, self.n)
+        return QuadraticFieldElement._from_mont(-self._u % self.n, -self._v % self.n,
+                                                self.c, self.n, self.mont)
+
+    def _mul_raw(self, other):
+        # unreduced Montgomery product as a (u, v) pair of ints
+        uu = self._u * other._u
+        vv = self._v * other._v
+        # Karatsuba: u*v' + v*u' from one product instead of two
+        t_v = (self._u + self._v) * (other._u + other._v) - uu - vv
+        t_u = uu - vv if self.c == -1 else uu + vv * self.c
+        return t_u, t_v
+
+    def _reduce(self, u, v):
+        redc = self.mont.redc
+        return QuadraticFieldElement._from_mont(redc(u), redc(v), self.c, self.n, self.mont)
 
     def __mul__(self, other):
         if not isinstance(other, QuadraticFieldElement):
             other = QuadraticFieldElement(other, 0, self.c, self.n)
         assert self.c == other.c and self.n == other.n
-        u = (self.u * other.u + self.v * other.v * self.c) % self.n
-        v = (self.u * other.v + self.v * other.u) % self.n
-        return QuadraticFieldElement(u, v, self.c, self.n)
+        return self._reduce(*self._mul_raw(other))
 
     def __rmul__(self, scalar):
-        return QuadraticFieldElement(self.u * scalar, self.v * scalar, self.c, self.n)
+        return QuadraticFieldElement._from_mont(self._u * scalar % self.n, self._v * scalar % self.n,
+                                                self.c, self.n, self.mont)
+
+    def __pow__(self, e):
+        u, v = qpow((self.u, self.v), e, self.c, self.n)
+        return QuadraticFieldElement(u, v, self.c, self.n)
 
     def __eq__(self, other):
         return (isinstance(other, QuadraticFieldElement)
-                and self.u == other.u
-                and self.v == other.v
+                and self._u == other._u
+                and self._v == other._v
                 and self.c == other.c
                 and self.n == other.n)
 
+# squares modulo 64, 63, 65 and 11; together they rule out ~99% of
+# non-squares before isqrt is needed
+_SQUARE_RESIDUES = [(m, frozenset(x * x % m for x in range(m))) for m in (64, 63, 65, 11)]
+
+def _is_square(n):
+    if n < 0:
+        return False
+    for m, residues in _SQUARE_RESIDUES:
+        if n % m not in residues:
+            return False
+    r = isqrt(n)
+    return r * r == n
+
+# quadratic residues modulo the first odd primes, for oddprime's fast path
+_SMALL_QR = {p: frozenset(x * x % p for x in range(1, p)) for p in (3, 5, 7, 11, 13)}
+
+def _small_kronecker(p, n):
+    # kronecker_symbol(p, n) for p in _SMALL_QR and odd n > 0, by quadratic
+    # reciprocity: (p/n) = (n/p), negated when p = n = 3 (mod 4)
+    r = n % p
+    if r == 0:
+        return 0
+    k = 1 if r in _SMALL_QR[p] else -1
+    return -k if p % 4 == 3 and n % 4 == 3 else k
+
+# _small_kronecker only looks at n mod p and n mod 4, so the first p in
+# _SMALL_QR with (p/n) = -1 is a function of n mod 4*3*5*7*11*13; tabulate
+# it once (0 when none of them qualifies)
+ODDPRIME_MOD = 4 * 3 * 5 * 7 * 11 * 13
+ODDPRIME_TBL = bytes(
+    next((p for p in _SMALL_QR if _small_kronecker(p, r) == -1), 0) if r % 2 else 0
+    for r in range(ODDPRIME_MOD)
+)
+
+@lru_cache(maxsize=4096)
 def oddprime(n):
     p = 3
+    if n > 0 and n % 2 == 1:
+        p = ODDPRIME_TBL[n % ODDPRIME_MOD]
+        if p:
+            return p
+        p = nextprime(max(_SMALL_QR))
     while True:
         if kronecker_symbol(p, n) == -1:
             return p
@@ -117,58 +338,207 @@ def oddprime(n):
 def sqrtc(c, n):
     return QuadraticFieldElement(0, 1, c, n)
 
+def _window_pow(base, e, mul, one, window=5):
+    # left-to-right sliding-window exponentiation, the scheme CPython's
+    # three-argument pow() uses for long exponents: odd powers
+    # base, base^3, ..., base^(2^window - 1) are precomputed once, then
+    # each run of up to `window` bits costs one multiply
+    if e == 0:
+        return one
+    sq = mul(base, base)
+    odd = [base]
+    for _ in range((1 << (window - 1)) - 1):
+        odd.append(mul(odd[-1], sq))
+    bits = bin(e)[2:]
+    result = None
+    i = 0
+    while i < len(bits):
+        if bits[i] == '0':
+            result = mul(result, result)
+            i += 1
+            continue
+        j = min(i + window, len(bits))
+        while bits[j - 1] == '0':
+            j -= 1
+        if result is not None:
+            for _ in range(j - i):
+                result = mul(result, result)
+        w = odd[int(bits[i:j], 2) >> 1]
+        result = w if result is None else mul(result, w)
+        i = j
+    return result
+
+def qpow(base, e, c, n):
+    # base**e in Z[√c]/n for base = (u, v) as a plain tuple of ints
+    def qmul(x, y):
+        uu = x[0] * y[0]
+        vv = x[1] * y[1]
+        return ((uu + vv * c) % n, ((x[0] + x[1]) * (y[0] + y[1]) - uu - vv) % n)
+    return _window_pow((base[0] % n, base[1] % n), e, qmul, (1 % n, 0))
+
+def xmat_q(a):
+    c, n = a.c, a.n
+    return [[a + a, QuadraticFieldElement(-1, 0, c, n)],
+            [QuadraticFieldElement(1, 0, c, n), QuadraticFieldElement(0, 0, c, n)]]
+
+def xmat_int(a):
+    return [[2 * a, -1], [1, 0]]
+
 def xmat(n, a):
-    two_a = a + a
-    neg1  = -1 if not isinstance(a, QuadraticFieldElement) else QuadraticFieldElement(-1, 0, a.c, a.n)
-    one   =  1 if not isinstance(a, QuadraticFieldElement) else QuadraticFieldElement(1, 0, a.c, a.n)
-    zero  =  0 if not isinstance(a, QuadraticFieldElement) else QuadraticFieldElement(0, 0, a.c, a.n)
-    return [[two_a, neg1], [one, zero]]
+    return xmat_q(a) if isinstance(a, QuadraticFieldElement) else xmat_int(a)
+
+def _dot_q(x0, y0, x1, y1):
+    # x0*y0 + x1*y1 for field elements, reducing each coordinate once
+    # instead of per product
+    u0, v0 = x0._mul_raw(y0)
+    u1, v1 = x1._mul_raw(y1)
+    return x0._reduce(u0 + u1, v0 + v1)
+
+def _mat_mul_mat_q(A, B):
+    return [
+        [_dot_q(A[0][0], B[0][0], A[0][1], B[1][0]), _dot_q(A[0][0], B[0][1], A[0][1], B[1][1])],
+        [_dot_q(A[1][0], B[0][0], A[1][1], B[1][0]), _dot_q(A[1][0], B[0][1], A[1][1], B[1][1])]
+    ]
+
+def mat_mul_mat(A, B):
+    return [
+        [A[0][0]*B[0][0] + A[0][1]*B[1][0], A[0][0]*B[0][1] + A[0][1]*B[1][1]],
+        [A[1][0]*B[0][0] + A[1][1]*B[1][0], A[1][0]*B[0][1] + A[1][1]*B[1][1]]
+    ]
+
+def mat_mul_vec(A, v):
+    return [A[0][0]*v[0] + A[0][1]*v[1], A[1][0]*v[0] + A[1][1]*v[1]]
 
 def mat_mul(A, B):
-    if isinstance(B[0], list):
-        return [
-            [A[0][0]*B[0][0] + A[0][1]*B[1][0], A[0][0]*B[0][1] + A[0][1]*B[1][1]],
-            [A[1][0]*B[0][0] + A[1][1]*B[1][0], A[1][0]*B[0][1] + A[1][1]*B[1][1]]
-        ]
-    return [A[0][0]*B[0] + A[0][1]*B[1], A[1][0]*B[0] + A[1][1]*B[1]]
+    if not isinstance(B[0], list):
+        return mat_mul_vec(A, B)
+    if isinstance(A[0][0], QuadraticFieldElement):
+        return _mat_mul_mat_q(A, B)
+    return mat_mul_mat(A, B)
 
 def mat_pow(M, exponent):
-    result = [[1, 0], [0, 1]]
+    # the product is picked once here rather than per step
     if isinstance(M[0][0], QuadraticFieldElement):
         one = QuadraticFieldElement(1, 0, M[0][0].c, M[0][0].n)
         zero = QuadraticFieldElement(0, 0, M[0][0].c, M[0][0].n)
-        result = [[one, zero], [zero, one]]
-
-    base = M
-    e = exponent
-    while e > 0:
-        if e & 1:
-            result = mat_mul(base, result)
-        base = mat_mul(base, base)
-        e >>= 1
-    return result
-
-def myisprime(n, a):
-    M   = xmat(n, a)
-    Mn  = mat_pow(M, n)
-    one = 1 if not isinstance(a, QuadraticFieldElement) else QuadraticFieldElement(1, 0, a.c, a.n)
-    xp  = mat_mul(Mn, [a, one])
-    c      = a.c if isinstance(a, QuadraticFieldElement) else oddprime(n)
-    target = QuadraticFieldElement(1, -1, c, n)
-    return xp[1] == target
-
-def is_prime(n):
+        return _window_pow(M, exponent, _mat_mul_mat_q, [[one, zero], [zero, one]], window=4)
+    return _window_pow(M, exponent, mat_mul_mat, [[1, 0], [0, 1]], window=4)
+
+def _lucas_ladder_q(n, a):
+    # lucas_ladder on raw Montgomery (u, v) tuples, so the loop allocates no
+    # QuadraticFieldElement and does no isinstance checks or attribute lookups
+    c = a.c
+    mod = a.n
+    redc = a.mont.redc
+
+    def dbl_mul_sub(x, y, s):
+        # 2*x*y - s; the doubling is folded into the unreduced product
+        x0, x1 = x
+        y0, y1 = y
+        uu = x0 * y0
+        vv = x1 * y1
+        u = redc((uu + vv * c) << 1) - s[0]
+        v = redc(((x0 + x1) * (y0 + y1) - uu - vv) << 1) - s[1]
+        return (u + mod if u < 0 else u, v + mod if v < 0 else v)
+
+    one = (a.mont.to_mont(1), 0)
+    a_m = (a._u, a._v)
+    t0, t1 = one, a_m
+    for bit in bin(n)[2:]:
+        if bit == '1':
+            t0, t1 = dbl_mul_sub(t0, t1, a_m), dbl_mul_sub(t1, t1, one)
+        else:
+            t0, t1 = dbl_mul_sub(t0, t0, one), dbl_mul_sub(t0, t1, a_m)
+    return QuadraticFieldElement._from_mont(t0[0], t0[1], c, mod, a.mont)
+
+def lucas_ladder(n, a, mod=None):
+    # T_n(a), i.e. the second entry of mat_pow(xmat(n, a), n) * [a, 1], walked
+    # over the bits of n as the pair (T_k, T_k+1) using
+    #   T_2k = 2*T_k^2 - 1,  T_2k+1 = 2*T_k*T_k+1 - a
+    # which costs two field multiplies per bit instead of a matrix product;
+    # for an int a, `mod` reduces every step into ZZ/mod
+    if isinstance(a, QuadraticFieldElement):
+        if cheby_kernel is not None:
+            u, v = cheby_kernel.lucas_ladder_q(a.u, a.v, a.c, a.n, n)
+            return QuadraticFieldElement(u, v, a.c, a.n)
+        return _lucas_ladder_q(n, a)
+    neg_a = -a
+    t0, t1 = 1, a
+    for bit in bin(n)[2:]:
+        p = t0 * t1
+        if bit == '1':
+            s = t1 * t1
+            t0, t1 = p + p + neg_a, s + s - 1
+        else:
+            s = t0 * t0
+            t0, t1 = s + s - 1, p + p + neg_a
+        if mod is not None:
+            t0, t1 = t0 % mod, t1 % mod
+    return t0
+
+def myisprime(n, a, c=None):
+    if not isinstance(a, QuadraticFieldElement):
+        # in ZZ/n, T_p(a) = a^p = a (mod p) for prime p
+        a = a % n
+        return lucas_ladder(n, a, n) == a
+    tn     = lucas_ladder(n, a)
+    c      = a.c if c is None else c
+    # for prime n, T_n(a) = a^n is the Frobenius conjugate u - v√c of a
+    target = QuadraticFieldElement(a.u, -a.v, c, n)
+    return tn == target
+
+# Miller-Rabin bases for the pre-filter; deterministic below 3.4e12, and
+# above that the Chebyshev test still has the final word
+MR_BASES = (2, 3, 5, 7, 11, 13)
+
+def _miller_rabin(n, bases=MR_BASES):
+    # False if some base proves odd n > max(bases) composite
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for b in bases:
+        x = powmod(b, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def _quick_check(n):
+    # True/False when the cheap filters settle n, None when it needs the
+    # Chebyshev test
     if n < 2:
         return False
     if n == 2:
         return True
     if n % 2 == 0:
         return False
-    if is_square(n):
+    for p in SMALL_PRIMES:
+        if n == p:
+            return True
+        if n % p == 0:
+            return False
+    if _is_square(n):
         return False
+    if not _miller_rabin(n):
+        return False
+    return None
+
+def _chebyshev_test(n):
     c = oddprime(n)
     a = QuadraticFieldElement(1, 1, c, n)
-    return myisprime(n, a)
+    return myisprime(n, a, c)
+
+def is_prime(n):
+    n = mpz(n)
+    quick = _quick_check(n)
+    if quick is not None:
+        return quick
+    return _chebyshev_test(n)
 
 # --- End of code from cheby.py ---
 
@@ -177,6 +547,79 @@ def is_prime(n):
 
 app = Flask(__name__)
 
+# worker processes come from a fork server rather than from fork() in
+# the serving threads, which can deadlock; it preloads this module so each
+# child starts without re-importing it
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    _mp = multiprocessing.get_context('forkserver')
+    _mp.set_forkserver_preload([__name__])
+else:
+    _mp = multiprocessing.get_context('spawn')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    # threads that each supervise one run_with_timeout process, so /batch
+    # items run side by side; waitress serves requests from several
+    # threads, so creation is locked to keep two of them from each
+    # starting a pool
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+        return _executor
+
+def _run_child(conn, fn, args):
+    try:
+        conn.send((True, fn(*args)))
+    except Exception as e:
+        conn.send((False, e))
+    finally:
+        conn.close()
+
+def run_with_timeout(fn, *args, timeout):
+    """
+    Run fn(*args) in a process of its own and return its result. If it has
+    not answered within `timeout` seconds only that process is killed and
+    TimeoutError is raised, so other requests are unaffected.
+    """
+    receiver, sender = _mp.Pipe(duplex=False)
+    process = _mp.Process(target=_run_child, args=(sender, fn, args), daemon=True)
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            raise TimeoutError("computation exceeded limit")
+        ok, value = receiver.recv()
+    except EOFError:
+        raise RuntimeError("computation failed")
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        receiver.close()
+    if not ok:
+        raise value
+    return value
+
+def check_prime(n, timeout):
+    """
+    is_prime for the routes: small inputs are filtered on the calling
+    thread, and only the Chebyshev test, or the whole of is_prime for
+    inputs above QUICK_CHECK_BITS, goes through run_with_timeout.
+    Inputs up to INLINE_TEST_BITS skip the worker process altogether.
+    """
+    n = mpz(n)
+    if n.bit_length() <= INLINE_TEST_BITS:
+        return is_prime(n)
+    if n.bit_length() <= QUICK_CHECK_BITS:
+        quick = _quick_check(n)
+        if quick is not None:
+            return quick
+        return run_with_timeout(_chebyshev_test, n, timeout=timeout)
+    return run_with_timeout(is_prime, n, timeout=timeout)
+
 # The HTML for the user interface is stored in this string.
 # It uses Tailwind CSS for styling.
 HTML_TEMPLATE = """
@@ -238,6 +681,10 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# compiled once with Flask's Jinja environment (so autoescaping still
+# applies) instead of on every render_template_string call
+_TPL = app.jinja_env.from_string(HTML_TEMPLATE)
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     result_text = ''
@@ -249,14 +696,42 @@ def index():
             if not expression:
                 raise ValueError("Input cannot be empty.")
             n = parse_int_expr(expression)
-            if is_prime(n):
+            if check_prime(n, COMPUTE_TIMEOUT):
                 result_text = f"It is prime."
             else:
                 result_text = f"It is composite."
         except Exception as e:
             result_text = f"Error: {e}"
             
-    return render_template_string(HTML_TEMPLATE, result=result_text, last_input=last_input)
+    response = make_response(_TPL.render(result=result_text, last_input=last_input))
+    if request.method == 'GET':
+        response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    # JSON list of expressions in, one {"input", "prime" | "error"} per item out
+    expressions = request.get_json(silent=True)
+    if not isinstance(expressions, list):
+        return jsonify(error="Expected a JSON list of expressions."), 400
+    if len(expressions) > MAX_BATCH:
+        return jsonify(error=f"At most {MAX_BATCH} expressions per batch."), 400
+    results = [{'input': e} for e in expressions]
+    parsed = []
+    for item in results:
+        try:
+            parsed.append((item, parse_int_expr(str(item['input']))))
+        except Exception as e:
+            item['error'] = str(e)
+    # each item gets its own COMPUTE_TIMEOUT, counted from when it starts
+    futures = [(item, get_executor().submit(check_prime, n, COMPUTE_TIMEOUT))
+               for item, n in parsed]
+    for item, f in futures:
+        try:
+            item['prime'] = f.result()
+        except Exception as e:
+            item['error'] = str(e)
+    return jsonify(results)
 
 if __name__ == '__main__':
     from waitress import serve
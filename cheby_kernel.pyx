@@ -0,0 +1,38 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled inner loop of the Chebyshev primality test.
+
+Build in place with `cythonize -i cheby_kernel.pyx`; app.py uses the pure
+Python ladder when the built module is absent.
+
+Elements of Z[√c]/n are passed as plain (u, v) coordinates. The ints stay
+Python ints (CPython has no fixed-width type that holds them), so the gain
+is in dropping bytecode dispatch, frame setup and tuple packing per step.
+"""
+
+
+cdef inline tuple _dbl_mul_sub(object x0, object x1, object y0, object y1,
+                               object s0, object s1, object c, object n):
+    # 2*(x0 + x1√c)*(y0 + y1√c) - (s0 + s1√c) mod n
+    cdef object uu = x0 * y0
+    cdef object vv = x1 * y1
+    cdef object u = (((uu + vv * c) << 1) - s0) % n
+    cdef object v = ((((x0 + x1) * (y0 + y1) - uu - vv) << 1) - s1) % n
+    return u, v
+
+
+def lucas_ladder_q(u, v, c, n, e):
+    """T_e(u + v√c) mod n as a (u, v) tuple; see app.lucas_ladder."""
+    cdef object t0u = 1 % n, t0v = 0
+    cdef object t1u = u % n, t1v = v % n
+    cdef object au = t1u, av = t1v
+    cdef object one = t0u
+    cdef Py_UCS4 bit
+    for bit in bin(e)[2:]:
+        if bit == '1':
+            (t0u, t0v), (t1u, t1v) = (_dbl_mul_sub(t0u, t0v, t1u, t1v, au, av, c, n),
+                                      _dbl_mul_sub(t1u, t1v, t1u, t1v, one, 0, c, n))
+        else:
+            (t0u, t0v), (t1u, t1v) = (_dbl_mul_sub(t0u, t0v, t0u, t0v, one, 0, c, n),
+                                      _dbl_mul_sub(t0u, t0v, t1u, t1v, au, av, c, n))
+    return t0u, t0v